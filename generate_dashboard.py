@@ -1,58 +1,87 @@
 #!/usr/bin/env python3
-"""Generate self-contained HTML dashboard with embedded images"""
+"""Generate self-contained HTML dashboard with inline SVG charts"""
 
-import json
-import base64
 import pandas as pd
 import altair as alt
+import vl_convert as vlc
 import re
 from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+# RE2 matches in linear time on large stderr blobs; the stdlib engine is the fallback
+try:
+    import re2 as pattern_re
+except ImportError:
+    pattern_re = re
+
+# Aho-Corasick finds all literal error patterns in one pass over a stderr;
+# plain substring checks are the fallback
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 alt.data_transformers.disable_max_rows()
 
-DATA_FILE = 'data/error-jobs-sanitized.json.gz'
+DATA_FILE = 'data/error-jobs-sanitized.parquet'
 
-print("Loading data...")
-import gzip
-with gzip.open(DATA_FILE, 'rt', encoding='utf-8') as f:
-    raw_data = json.load(f)
+# The only fields the dashboard reads; the large stdout/command line/etc.
+# text columns are never loaded
+COLUMNS = ['create_time', 'tool_id', 'tool_stderr', 'exit_code', 'destination_id', 'user_id']
 
-df = pd.DataFrame(raw_data)
+print("Loading data...")
+df = pd.read_parquet(DATA_FILE, columns=COLUMNS)
 print(f"Loaded {len(df):,} records")
 
 # Parse timestamps
 df['create_time'] = pd.to_datetime(df['create_time'], format='ISO8601')
-df['date'] = df['create_time'].dt.date
 df['hour'] = df['create_time'].dt.hour
 df['day_of_week'] = df['create_time'].dt.day_name()
 
-# Extract tool name
-def get_tool_name(tool_id):
-    if not tool_id or pd.isna(tool_id):
-        return 'unknown'
-    parts = str(tool_id).split('/')
-    return parts[3] if len(parts) >= 4 else str(tool_id)
-
-df['tool_name'] = df['tool_id'].apply(get_tool_name)
-
-# Generate charts and convert to base64
-def chart_to_base64(chart):
-    png_data = chart.to_dict()
-    # Save to PNG and encode
-    import io
-    png_bytes = io.BytesIO()
-    chart.save(png_bytes, format='png', scale_factor=2)
-    png_bytes.seek(0)
-    return base64.b64encode(png_bytes.read()).decode('utf-8')
+# Extract tool name (4th path component of toolshed ids, the id itself otherwise)
+tool_ids = df['tool_id'].astype('string')
+tool_id_parts = tool_ids.str.split('/')
+df['tool_name'] = (tool_id_parts.str[3]
+                   .where(tool_id_parts.str.len() >= 4, tool_ids)
+                   .mask(tool_ids.fillna('') == '', 'unknown'))
+
+# Low-cardinality keys as categoricals, so groupby/value_counts hash integer
+# codes. Categories keep first-appearance order so count ties sort as before.
+def as_category(series):
+    return series.astype(pd.CategoricalDtype(series.dropna().unique()))
+
+for column in ['tool_name', 'day_of_week', 'destination_id']:
+    df[column] = as_category(df[column])
+
+# Job counts per (tool, exit code, destination) in a single pass; every
+# tool / exit code / destination table below is sliced from this
+key_counts = df.groupby(['tool_name', 'exit_code', 'destination_id'],
+                        observed=True, sort=False, dropna=False).size()
+
+def level_counts(counts, level, dropna=False):
+    """Total of `counts` per value of one index level, largest first"""
+    totals = counts.groupby(level=level, observed=True, sort=False, dropna=dropna).sum()
+    return totals.sort_values(ascending=False, kind='stable')
+
+def none_label(index):
+    return index.map(lambda value: 'None' if pd.isna(value) else str(value))
+
+tool_totals = level_counts(key_counts, 'tool_name')
+exit0_counts = key_counts[key_counts.index.get_level_values('exit_code') == 0]
+
+# Generate charts and render them to inline SVG
+def chart_to_svg(chart):
+    return vlc.vegalite_to_svg(chart.to_json())
 
 print("Generating charts...")
 
 charts = {}
 
 # 1. Top 20 failing tools
-tool_counts = df['tool_name'].value_counts().head(20).reset_index()
+tool_counts = tool_totals.head(20).reset_index()
 tool_counts.columns = ['tool', 'count']
 charts['top_tools'] = alt.Chart(tool_counts).mark_bar(color='#4a90d9').encode(
     x=alt.X('count:Q', title='Error Count'),
@@ -61,7 +90,9 @@ charts['top_tools'] = alt.Chart(tool_counts).mark_bar(color='#4a90d9').encode(
 ).properties(title='Top 20 Failing Tools', width=500, height=400)
 
 # 2. Exit codes
-exit_counts = df['exit_code'].fillna('None').astype(str).value_counts().head(12).reset_index()
+exit_counts = level_counts(key_counts, 'exit_code').head(12)
+exit_counts.index = none_label(exit_counts.index)
+exit_counts = exit_counts.reset_index()
 exit_counts.columns = ['exit_code', 'count']
 charts['exit_codes'] = alt.Chart(exit_counts).mark_bar().encode(
     x=alt.X('exit_code:N', sort='-y', title='Exit Code'),
@@ -71,7 +102,9 @@ charts['exit_codes'] = alt.Chart(exit_counts).mark_bar().encode(
 ).properties(title='Exit Code Distribution', width=500, height=250)
 
 # 3. Destinations
-dest_counts = df['destination_id'].fillna('None').value_counts().reset_index()
+dest_counts = level_counts(key_counts, 'destination_id')
+dest_counts.index = none_label(dest_counts.index)
+dest_counts = dest_counts.reset_index()
 dest_counts.columns = ['destination', 'count']
 charts['destinations'] = alt.Chart(dest_counts).mark_bar(color='#27ae60').encode(
     x=alt.X('count:Q', title='Error Count'),
@@ -80,8 +113,8 @@ charts['destinations'] = alt.Chart(dest_counts).mark_bar(color='#27ae60').encode
 ).properties(title='Failures by Destination', width=500, height=350)
 
 # 4. Daily trend
-daily = df.groupby('date').size().reset_index(name='count')
-daily['date'] = pd.to_datetime(daily['date'])
+daily = (df['create_time'].dt.floor('D').value_counts(sort=False).sort_index()
+         .rename_axis('date').reset_index(name='count'))
 charts['daily'] = alt.Chart(daily).mark_line(point=True, color='#e67e22').encode(
     x=alt.X('date:T', title='Date'),
     y=alt.Y('count:Q', title='Error Count'),
@@ -103,7 +136,7 @@ charts['dow'] = alt.Chart(dow_counts).mark_bar().encode(
 ).properties(title='Errors by Day of Week', width=450, height=220)
 
 # 6. Hour heatmap
-hour_dow = df.groupby(['hour', 'day_of_week']).size().reset_index(name='count')
+hour_dow = df.groupby(['hour', 'day_of_week'], observed=True).size().reset_index(name='count')
 charts['hour_heatmap'] = alt.Chart(hour_dow).mark_rect().encode(
     x=alt.X('hour:O', title='Hour (UTC)'),
     y=alt.Y('day_of_week:N', sort=dow_order, title='Day'),
@@ -121,11 +154,53 @@ error_patterns = {
     'Process Killed': r'Killed|SIGKILL|signal 9',
     'Permission': r'Permission denied|Access denied',
 }
+REGEX_METACHARS = frozenset('.^$*+?{}[]\\|()')
+
+def literal_alternatives(pattern):
+    """Lowercased alternatives of a plain `a|b|c` pattern, or None if it needs a regex"""
+    alternatives = pattern.split('|')
+    if any(REGEX_METACHARS.intersection(option) for option in alternatives):
+        return None
+    return [option.lower() for option in alternatives]
+
+# Plain literal lists are matched as lowercase substrings, the rest as regexes
+literal_patterns = {}
+regex_patterns = {}
+for name, pat in error_patterns.items():
+    literals = literal_alternatives(pat)
+    if literals is None:
+        regex_patterns[name] = pattern_re.compile('(?i)' + pat)
+    else:
+        literal_patterns[name] = literals
+
+if ahocorasick is not None and literal_patterns:
+    automaton = ahocorasick.Automaton()
+    literal_names = {}
+    for name, literals in literal_patterns.items():
+        for literal in literals:
+            literal_names.setdefault(literal, set()).add(name)
+    for literal, names in literal_names.items():
+        automaton.add_word(literal, names)
+    automaton.make_automaton()
+else:
+    automaton = None
+
+def match_patterns(stderr):
+    """Names of the error_patterns categories found in a stderr, in dict order"""
+    lowered = stderr.lower()
+    if automaton is not None:
+        found = set()
+        for _, names in automaton.iter(lowered):
+            found |= names
+    else:
+        found = {name for name, literals in literal_patterns.items()
+                 if any(literal in lowered for literal in literals)}
+    found.update(name for name, pat in regex_patterns.items() if pat.search(stderr))
+    return [name for name in error_patterns if name in found]
+
 pattern_counts = Counter()
 for stderr in df['tool_stderr'].dropna():
-    for name, pat in error_patterns.items():
-        if re.search(pat, str(stderr), re.IGNORECASE):
-            pattern_counts[name] += 1
+    pattern_counts.update(match_patterns(str(stderr)))
 
 pattern_df = pd.DataFrame([{'pattern': k, 'count': v} for k, v in pattern_counts.most_common()])
 charts['patterns'] = alt.Chart(pattern_df).mark_bar(color='#9b59b6').encode(
@@ -134,30 +209,49 @@ charts['patterns'] = alt.Chart(pattern_df).mark_bar(color='#9b59b6').encode(
     tooltip=['pattern', 'count']
 ).properties(title='Error Pattern Categories', width=450, height=220)
 
-# Convert all charts to base64
-print("Converting charts to base64...")
-chart_images = {}
-for name, chart in charts.items():
-    chart_images[name] = chart_to_base64(chart)
+# Render all charts to SVG
+print("Rendering charts to SVG...")
+with ThreadPoolExecutor(max_workers=len(charts)) as executor:
+    chart_svgs = dict(zip(charts, executor.map(chart_to_svg, charts.values())))
+for name in chart_svgs:
     print(f"  {name} done")
 
 # Collect stats for tables
-top20_tools = df['tool_name'].value_counts().head(20)
-top_users = df[df['user_id'].notna()]['user_id'].value_counts().head(10)
-exit0_tools = df[df['exit_code'] == 0]['tool_name'].value_counts().head(5)
+top20_tools = tool_totals.head(20)
+user_counts = df['user_id'].value_counts()
+top_users = user_counts.head(10)
+anonymous_errors = len(df) - user_counts.sum()
+exit0_tools = level_counts(exit0_counts, 'tool_name').head(5)
+
+# Split out the top-20 tools' rows in one pass
+top20_df = df[df['tool_name'].isin(top20_tools.index)]
+tool_dfs = dict(list(top20_df.groupby('tool_name', sort=False, observed=True)))
+tool_stderrs = {tool: tool_df['tool_stderr'].dropna() for tool, tool_df in tool_dfs.items()}
+
+# Candidate message lines: stripped lines longer than 10 / 5 chars
+SUMMARY_LINE = re.compile(r'^[^\S\n]*(\S[^\n]{9,}\S)', re.MULTILINE)
+ERROR_KEY_LINE = re.compile(r'^[^\S\n]*(\S[^\n]{4,}\S)', re.MULTILINE)
+
+def summary_line(stderr):
+    """First meaningful stderr line for the dashboard's brief per-tool table"""
+    for match in SUMMARY_LINE.finditer(str(stderr)):
+        line = match.group(1)
+        if '====' not in line and '____' not in line:
+            return line[:60]
+    return None
+
+def error_key_line(stderr):
+    """First meaningful stderr line, used to group errors on the tool pages"""
+    for match in ERROR_KEY_LINE.finditer(stderr):
+        line = match.group(1)
+        if '====' not in line and '____' not in line and '\\' not in line:
+            return line[:100]
+    return None
 
 # Per-tool errors (brief for dashboard)
 tool_errors = {}
 for tool in top20_tools.index:
-    tool_df = df[df['tool_name'] == tool]
-    errs = Counter()
-    for stderr in tool_df['tool_stderr'].dropna():
-        lines = str(stderr).strip().split('\n')
-        for line in lines:
-            line = line.strip()
-            if line and '====' not in line and '____' not in line and len(line) > 10:
-                errs[line[:60]] += 1
-                break
+    errs = Counter(line for line in map(summary_line, tool_stderrs[tool]) if line)
     tool_errors[tool] = errs.most_common(5)
 
 # Generate individual tool HTML files
@@ -183,35 +277,38 @@ CSS_STYLE = '''
     .error-msg { font-family: monospace; font-size: 0.85em; white-space: pre-wrap; word-break: break-all; background: rgba(0,0,0,0.3); padding: 8px; border-radius: 4px; display: block; margin: 5px 0; }
 '''
 
-for tool in top20_tools.index:
-    tool_df = df[df['tool_name'] == tool]
+SAFE_NAME_PATTERN = re.compile(r'[^a-zA-Z0-9_-]')
+
+@lru_cache(maxsize=None)
+def safe_filename(tool):
+    """Tool name with anything but [a-zA-Z0-9_-] replaced, for page file names"""
+    return SAFE_NAME_PATTERN.sub('_', tool)
+
+def write_tool_page(tool):
+    """Build and write tools/<tool>.html, returning the output path"""
+    tool_df = tool_dfs[tool]
     total = len(tool_df)
 
     # Get ALL unique error messages
     all_errors = Counter()
     full_stderrs = {}
-    for stderr in tool_df['tool_stderr'].dropna():
+    for stderr in tool_stderrs[tool]:
         stderr_str = str(stderr).strip()
         # Get first meaningful line as key
-        lines = stderr_str.split('\n')
-        key = None
-        for line in lines:
-            line = line.strip()
-            if line and '====' not in line and '____' not in line and '\\' not in line and len(line) > 5:
-                key = line[:100]
-                break
+        key = error_key_line(stderr_str)
         if key:
             all_errors[key] += 1
             if key not in full_stderrs:
                 full_stderrs[key] = stderr_str[:4000]
 
     # Exit codes for this tool
-    tool_exit_codes = tool_df['exit_code'].value_counts().head(5)
+    tool_key_counts = key_counts.xs(tool, level='tool_name')
+    tool_exit_codes = level_counts(tool_key_counts, 'exit_code', dropna=True).head(5)
 
     # Destinations for this tool
-    tool_dests = tool_df['destination_id'].value_counts().head(5)
+    tool_dests = level_counts(tool_key_counts, 'destination_id', dropna=True).head(5)
 
-    tool_html = f'''<!DOCTYPE html>
+    parts = [f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -242,47 +339,49 @@ for tool in top20_tools.index:
         <h2 style="color: var(--accent); margin: 30px 0 15px;">Exit Codes</h2>
         <table>
             <tr><th>Exit Code</th><th>Count</th></tr>
-'''
+''']
     for ec, cnt in tool_exit_codes.items():
         ec_str = str(int(ec)) if pd.notna(ec) else 'None'
-        tool_html += f'            <tr><td>{ec_str}</td><td>{cnt:,}</td></tr>\n'
+        parts.append(f'            <tr><td>{ec_str}</td><td>{cnt:,}</td></tr>\n')
 
-    tool_html += '''        </table>
+    parts.append('''        </table>
 
         <h2 style="color: var(--accent); margin: 30px 0 15px;">Destinations</h2>
         <table>
             <tr><th>Destination</th><th>Count</th></tr>
-'''
+''')
     for dest, cnt in tool_dests.items():
-        tool_html += f'            <tr><td>{dest}</td><td>{cnt:,}</td></tr>\n'
+        parts.append(f'            <tr><td>{dest}</td><td>{cnt:,}</td></tr>\n')
 
-    tool_html += '''        </table>
+    parts.append('''        </table>
 
         <h2 style="color: var(--accent); margin: 30px 0 15px;">All Unique Error Messages</h2>
         <table>
             <tr><th style="width: 80px;">Count</th><th>Error Message</th></tr>
-'''
+''')
     for msg, cnt in all_errors.most_common():
         safe_msg = msg.replace('<', '&lt;').replace('>', '&gt;')
         full = full_stderrs.get(msg, '')
         safe_full = full.replace('<', '&lt;').replace('>', '&gt;') if full != msg else ''
 
-        tool_html += f'            <tr><td>{cnt:,}</td><td><span class="error-msg">{safe_msg}</span>'
+        parts.append(f'            <tr><td>{cnt:,}</td><td><span class="error-msg">{safe_msg}</span>')
         if safe_full and len(safe_full) > len(safe_msg) + 20:
-            tool_html += f'<details><summary style="color: var(--text-muted); cursor: pointer; margin-top: 5px;">Show full stderr</summary><span class="error-msg" style="margin-top: 10px;">{safe_full}</span></details>'
-        tool_html += '</td></tr>\n'
+            parts.append(f'<details><summary style="color: var(--text-muted); cursor: pointer; margin-top: 5px;">Show full stderr</summary><span class="error-msg" style="margin-top: 10px;">{safe_full}</span></details>')
+        parts.append('</td></tr>\n')
 
-    tool_html += '''        </table>
+    parts.append('''        </table>
     </div>
 </body>
 </html>
-'''
+''')
+
+    output_path = Path(f'tools/{safe_filename(tool)}.html')
+    output_path.write_text(''.join(parts))
+    return output_path
 
-    # Sanitize tool name for filename
-    safe_tool_name = re.sub(r'[^a-zA-Z0-9_-]', '_', tool)
-    with open(f'tools/{safe_tool_name}.html', 'w') as f:
-        f.write(tool_html)
-    print(f"  {tool} -> tools/{safe_tool_name}.html")
+with ThreadPoolExecutor(max_workers=8) as executor:
+    for tool, output_path in zip(top20_tools.index, executor.map(write_tool_page, top20_tools.index)):
+        print(f"  {tool} -> {output_path}")
 
 # Spike days
 daily_mean = daily['count'].mean()
@@ -293,7 +392,7 @@ spikes = daily[daily['count'] > threshold]
 # Generate HTML
 print("Generating HTML...")
 
-html = f'''<!DOCTYPE html>
+parts = [f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -355,7 +454,7 @@ html = f'''<!DOCTYPE html>
         }}
         h3 {{ color: var(--text); margin: 20px 0 10px; }}
         .chart {{ text-align: center; margin: 20px 0; }}
-        .chart img {{ max-width: 100%; height: auto; border-radius: 8px; }}
+        .chart svg {{ max-width: 100%; height: auto; border-radius: 8px; }}
         table {{
             width: 100%;
             border-collapse: collapse;
@@ -388,7 +487,7 @@ html = f'''<!DOCTYPE html>
     <div class="container">
         <header>
             <h1>Galaxy Job Error Analysis</h1>
-            <p class="subtitle">{df['date'].min()} to {df['date'].max()}</p>
+            <p class="subtitle">{daily['date'].min():%Y-%m-%d} to {daily['date'].max():%Y-%m-%d}</p>
         </header>
 
         <div class="stats">
@@ -401,7 +500,7 @@ html = f'''<!DOCTYPE html>
                 <div class="stat-label">Unique Tools</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{df['user_id'].nunique():,}</div>
+                <div class="stat-value">{len(user_counts):,}</div>
                 <div class="stat-label">Unique Users</div>
             </div>
             <div class="stat-card">
@@ -413,28 +512,29 @@ html = f'''<!DOCTYPE html>
         <section>
             <h2>1. Tool Failure Analysis</h2>
             <div class="chart">
-                <img src="data:image/png;base64,{chart_images['top_tools']}" alt="Top Tools">
+                {chart_svgs['top_tools']}
             </div>
             <h3>Top 20 Failing Tools</h3>
             <table>
                 <tr><th>Tool</th><th>Errors</th><th>Details</th></tr>
-'''
+''']
 
-for tool, cnt in top20_tools.items():
-    safe_tool_name = re.sub(r'[^a-zA-Z0-9_-]', '_', tool)
-    html += f'                <tr><td>{tool}</td><td>{cnt:,}</td><td><a href="tools/{safe_tool_name}.html" style="color: var(--accent);">View errors &rarr;</a></td></tr>\n'
+parts.extend(
+    f'                <tr><td>{tool}</td><td>{cnt:,}</td><td><a href="tools/{safe_filename(tool)}.html" style="color: var(--accent);">View errors &rarr;</a></td></tr>\n'
+    for tool, cnt in top20_tools.items()
+)
 
-html += f'''            </table>
+parts.append(f'''            </table>
         </section>
 
         <section>
             <h2>2. Error Classification</h2>
             <div class="grid-2">
                 <div class="chart">
-                    <img src="data:image/png;base64,{chart_images['exit_codes']}" alt="Exit Codes">
+                    {chart_svgs['exit_codes']}
                 </div>
                 <div class="chart">
-                    <img src="data:image/png;base64,{chart_images['patterns']}" alt="Error Patterns">
+                    {chart_svgs['patterns']}
                 </div>
             </div>
         </section>
@@ -442,91 +542,88 @@ html += f'''            </table>
         <section>
             <h2>2b. Per-Tool Error Breakdown (Top 5 each)</h2>
             <p style="color: var(--text-muted); margin-bottom: 20px;">Click tool name for full error list</p>
-'''
+''')
 
 for tool in list(top20_tools.index)[:10]:  # Show first 10 in dashboard
     errors = tool_errors.get(tool, [])
     total = top20_tools[tool]
-    safe_tool_name = re.sub(r'[^a-zA-Z0-9_-]', '_', tool)
-    html += f'''            <h3><a href="tools/{safe_tool_name}.html" style="color: var(--accent); text-decoration: none;">{tool}</a> ({total:,} errors)</h3>
+    parts.append(f'''            <h3><a href="tools/{safe_filename(tool)}.html" style="color: var(--accent); text-decoration: none;">{tool}</a> ({total:,} errors)</h3>
             <table>
                 <tr><th>Count</th><th>Error Message</th></tr>
-'''
+''')
     for msg, cnt in errors:
         safe_msg = msg.replace('<', '&lt;').replace('>', '&gt;')
-        html += f'                <tr><td>{cnt:,}</td><td><code>{safe_msg}</code></td></tr>\n'
-    html += '            </table>\n'
+        parts.append(f'                <tr><td>{cnt:,}</td><td><code>{safe_msg}</code></td></tr>\n')
+    parts.append('            </table>\n')
 
-html += f'''        </section>
+parts.append(f'''        </section>
 
         <section>
             <h2>3. Infrastructure Analysis</h2>
             <div class="chart">
-                <img src="data:image/png;base64,{chart_images['destinations']}" alt="Destinations">
+                {chart_svgs['destinations']}
             </div>
         </section>
 
         <section>
             <h2>4. Temporal Patterns</h2>
             <div class="chart">
-                <img src="data:image/png;base64,{chart_images['daily']}" alt="Daily Trend">
+                {chart_svgs['daily']}
             </div>
             <div class="grid-2">
                 <div class="chart">
-                    <img src="data:image/png;base64,{chart_images['dow']}" alt="Day of Week">
+                    {chart_svgs['dow']}
                 </div>
                 <div class="chart">
-                    <img src="data:image/png;base64,{chart_images['hour_heatmap']}" alt="Hour Heatmap">
+                    {chart_svgs['hour_heatmap']}
                 </div>
             </div>
-'''
+''')
 
 if len(spikes) > 0:
-    html += '''            <h3>Spike Days</h3>
+    parts.append('''            <h3>Spike Days</h3>
             <table>
                 <tr><th>Date</th><th>Errors</th></tr>
-'''
+''')
     for _, row in spikes.iterrows():
-        html += f'                <tr><td>{row["date"].strftime("%Y-%m-%d")}</td><td>{row["count"]:,}</td></tr>\n'
-    html += '            </table>\n'
+        parts.append(f'                <tr><td>{row["date"].strftime("%Y-%m-%d")}</td><td>{row["count"]:,}</td></tr>\n')
+    parts.append('            </table>\n')
 
-html += f'''        </section>
+parts.append(f'''        </section>
 
         <section>
             <h2>5. User Impact</h2>
             <h3>Top 10 Users by Error Count</h3>
             <table>
                 <tr><th>User ID</th><th>Errors</th></tr>
-'''
+''')
 
-for uid, cnt in top_users.items():
-    html += f'                <tr><td>{int(uid)}</td><td>{cnt:,}</td></tr>\n'
+parts.extend(f'                <tr><td>{int(uid)}</td><td>{cnt:,}</td></tr>\n' for uid, cnt in top_users.items())
 
-html += f'''            </table>
-            <p style="margin-top: 15px; color: var(--text-muted);">Anonymous errors (user_id=None): <strong>{df['user_id'].isna().sum():,}</strong></p>
+parts.append(f'''            </table>
+            <p style="margin-top: 15px; color: var(--text-muted);">Anonymous errors (user_id=None): <strong>{anonymous_errors:,}</strong></p>
         </section>
 
         <section>
             <h2>6. Anomalies</h2>
             <h3>Exit Code 0 Failures</h3>
-            <p>{len(df[df['exit_code'] == 0]):,} jobs exited with code 0 but were marked as failed.</p>
+            <p>{exit0_counts.sum():,} jobs exited with code 0 but were marked as failed.</p>
             <table>
                 <tr><th>Tool</th><th>Count</th></tr>
-'''
+''')
 
-for tool, cnt in exit0_tools.items():
-    html += f'                <tr><td>{tool}</td><td>{cnt:,}</td></tr>\n'
+parts.extend(f'                <tr><td>{tool}</td><td>{cnt:,}</td></tr>\n' for tool, cnt in exit0_tools.items())
 
-html += f'''            </table>
+parts.append(f'''            </table>
         </section>
 
         <p class="timestamp">Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
     </div>
 </body>
 </html>
-'''
+''')
 
-with open('index.html', 'w') as f:
-    f.write(html)
+html = ''.join(parts)
+Path('index.html').write_text(html)
 
 print(f"Dashboard saved to index.html ({len(html)//1024}KB)")
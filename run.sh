@@ -62,6 +62,16 @@ check_dependencies() {
         exit 1
     }
 
+    python3 -c "import ijson" 2>/dev/null || {
+        log_error "ijson not installed. Run: pip install ijson"
+        exit 1
+    }
+
+    python3 -c "import pyarrow" 2>/dev/null || {
+        log_error "pyarrow not installed. Run: pip install pyarrow"
+        exit 1
+    }
+
     log_info "All dependencies found"
 }
 
@@ -73,7 +83,7 @@ validate_json() {
 
 sanitize_json() {
     local input_file="$1"
-    local output_file="${2:-data/error-jobs-sanitized.json.gz}"
+    local output_file="${2:-data/error-jobs-sanitized.parquet}"
 
     log_info "Sanitizing $input_file..."
     python3 sanitize.py "$input_file" "$output_file"
@@ -82,8 +92,8 @@ sanitize_json() {
 generate_dashboard() {
     log_info "Generating dashboard..."
 
-    if [ ! -f "data/error-jobs-sanitized.json.gz" ]; then
-        log_error "Sanitized data not found at data/error-jobs-sanitized.json.gz"
+    if [ ! -f "data/error-jobs-sanitized.parquet" ]; then
+        log_error "Sanitized data not found at data/error-jobs-sanitized.parquet"
         log_error "Run with input JSON first: ./run.sh <input.json>"
         exit 1
     fi
@@ -115,7 +125,7 @@ show_usage() {
     echo "  ./run.sh --validate my-export.json"
     echo ""
     echo "Dependencies:"
-    echo "  pip install pandas altair vl-convert-python"
+    echo "  pip install pandas altair vl-convert-python ijson pyarrow"
 }
 
 # Main
@@ -2,25 +2,42 @@
 """
 Sanitize Galaxy error jobs JSON file for public sharing.
 
+Writes the sanitized records as a zstd-compressed Parquet file.
+
 Removes/redacts:
-- user_id: hashed with SHA256
+- user_id: hashed with BLAKE2b (32-bit digest)
 - session_id: removed
 - history_id: removed
 - Emails in text fields: replaced with [EMAIL]
 - /home/username paths: replaced with /home/[USER]
 """
 
-import json
-import gzip
-import re
 import hashlib
+import json
+import os
 import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 
-# Patterns to redact
-EMAIL_PATTERN = re.compile(r'\S+@\S+\.\S+')
-HOME_PATH_PATTERN = re.compile(r'/home/[a-zA-Z0-9_.-]+')
-USER_PATH_PATTERN = re.compile(r'/users?/[a-zA-Z0-9_.-]+', re.IGNORECASE)
+import ijson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from validate import open_input
+
+# Patterns to redact, applied in order as (RE2 pattern, replacement). These run
+# as separate column passes rather than one fused alternation: Arrow's
+# replace_substring_regex takes a single replacement string and cannot choose
+# one per matched group, and each pass is a vectorized RE2 kernel anyway
+REDACT_RULES = [
+    (r'\S+@\S+\.\S+', '[EMAIL]'),
+    (r'/home/[a-zA-Z0-9_.-]+', '/home/[USER]'),
+    (r'(?i)/users?/[a-zA-Z0-9_.-]+', '/user/[USER]'),
+]
 
 # Fields containing text to redact
 TEXT_FIELDS = [
@@ -39,76 +56,225 @@ FIELDS_TO_REMOVE = [
     'history_id',
 ]
 
-def load_json(filepath):
-    """Load JSON from file (supports .json and .json.gz)"""
-    filepath = Path(filepath)
+# Output column types for Galaxy's integer job fields, used when no
+# chunk has values to infer them from (other all-null fields default to string)
+FIELD_TYPES = {
+    'id': pa.int64(),
+    'user_id': pa.int64(),
+    'exit_code': pa.int64(),
+    'library_folder_id': pa.int64(),
+    'copied_from_job_id': pa.int64(),
+    'dynamic_tool_id': pa.int64(),
+    'tool_request_id': pa.int64(),
+}
+
+# Records per work unit handed to a worker process
+CHUNK_SIZE = 10000
+
+def iter_json(filepath):
+    """Stream records from a JSON array file (plain or gzip-compressed, detected from its content)"""
+    with open(filepath, 'rb') as raw:
+        yield from ijson.items(open_input(raw), 'item', use_float=True)
+
+def output_schema(schema):
+    """Build the Parquet schema from the unified chunk schema, typing all-null fields"""
+    fields = []
+    for field in schema:
+        if pa.types.is_null(field.type):
+            field = field.with_type(FIELD_TYPES.get(field.name, pa.string()))
+        fields.append(field)
+    return pa.schema(fields)
+
+def conform_table(table, schema):
+    """Cast a chunk to the output schema, filling absent fields with nulls"""
+    columns = [
+        table[field.name].cast(field.type) if field.name in table.column_names
+        else pa.nulls(table.num_rows, field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+def unify_schema(schemas):
+    """
+    Merge chunk schemas field by field: null takes any type and int widens to
+    double; fields whose types still conflict across chunks become strings
+    """
+    field_types = {}
+    for schema in schemas:
+        for field in schema:
+            field_types.setdefault(field.name, {})[field.type] = None
+
+    fields = []
+    for name, types in field_types.items():
+        try:
+            merged = pa.unify_schemas([pa.schema([(name, t)]) for t in types],
+                                      promote_options='permissive').field(0).type
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            merged = pa.string()
+        fields.append(pa.field(name, merged))
+    return pa.schema(fields)
+
+def write_parquet(tables, filepath):
+    """
+    Stream record tables to a zstd-compressed Parquet file.
 
-    if filepath.suffix == '.gz':
-        with gzip.open(filepath, 'rt', encoding='utf-8') as f:
-            return json.load(f)
-    else:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    Chunks are spooled to a temporary directory first, since a field may
+    first appear, or change type, in any chunk. The output schema is
+    unified from all of them, and the finished file replaces `filepath`
+    only once it is complete.
 
-def save_json(data, filepath, compress=True):
-    """Save JSON to file (optionally gzipped)"""
+    Returns:
+        (filepath, record_count)
+    """
     filepath = Path(filepath)
     filepath.parent.mkdir(parents=True, exist_ok=True)
 
-    if compress or filepath.suffix == '.gz':
-        if not filepath.suffix == '.gz':
-            filepath = Path(str(filepath) + '.gz')
-        with gzip.open(filepath, 'wt', encoding='utf-8') as f:
-            json.dump(data, f)
-    else:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f)
+    count = 0
+    with tempfile.TemporaryDirectory(dir=filepath.parent, prefix='.sanitize-') as spool:
+        spool = Path(spool)
 
-    return filepath
+        parts = []
+        schemas = []
+        for table in tables:
+            part = spool / f'chunk-{len(parts):06d}.parquet'
+            pq.write_table(table, part, compression='lz4')
+            parts.append(part)
+            schemas.append(table.schema)
+            count += table.num_rows
 
-def hash_id(value):
-    """Hash an ID to anonymize it while keeping it consistent"""
-    if value is None:
-        return None
-    return int(hashlib.sha256(str(value).encode()).hexdigest()[:8], 16)
+        schema = output_schema(unify_schema(schemas))
 
-def redact_text(text):
-    """Redact sensitive patterns from text"""
-    if not text:
-        return text
+        output = spool / filepath.name
+        with pq.ParquetWriter(output, schema, compression='zstd') as writer:
+            for part in parts:
+                writer.write_table(conform_table(pq.read_table(part), schema))
+                part.unlink()
 
-    text = str(text)
-    text = EMAIL_PATTERN.sub('[EMAIL]', text)
-    text = HOME_PATH_PATTERN.sub('/home/[USER]', text)
-    text = USER_PATH_PATTERN.sub('/user/[USER]', text)
+        os.replace(output, filepath)
 
-    return text
+    return filepath, count
 
-def sanitize_record(record):
-    """Sanitize a single record in place"""
+def hash_id(value):
+    """Hash an ID to anonymize it while keeping it consistent"""
+    if value is None:
+        return None
+    digest = hashlib.blake2b(str(value).encode(), digest_size=4).digest()
+    return int.from_bytes(digest, 'big')
+
+def hash_column(column):
+    """Hash an ID column, computing the hash of each distinct ID once"""
+    unique_ids = pc.unique(column)
+    values = unique_ids.to_pylist()
+    # Arrow promotes a chunk mixing int and float IDs to double; hash integral
+    # values as ints so an ID gets the same hash whichever chunk it lands in
+    if pa.types.is_floating(unique_ids.type):
+        values = [int(v) if v is not None and v.is_integer() else v for v in values]
+    hashed = pa.array([hash_id(value) for value in values], type=pa.int64())
+    return pc.take(hashed, pc.index_in(column, value_set=unique_ids))
+
+def redact_column(column):
+    """Redact sensitive patterns from a text column"""
+    if not pa.types.is_string(column.type):
+        column = pc.cast(column, pa.string())
+
+    for pattern, replacement in REDACT_RULES:
+        column = pc.replace_substring_regex(column, pattern=pattern, replacement=replacement)
+
+    return column
+
+def sanitize_table(table):
+    """Sanitize an Arrow table of records column by column"""
     # Hash user_id
-    if 'user_id' in record:
-        record['user_id'] = hash_id(record['user_id'])
+    if 'user_id' in table.column_names:
+        index = table.schema.get_field_index('user_id')
+        table = table.set_column(index, 'user_id', hash_column(table['user_id']))
 
     # Remove sensitive ID fields
-    for field in FIELDS_TO_REMOVE:
-        record.pop(field, None)
+    table = table.drop_columns([f for f in FIELDS_TO_REMOVE if f in table.column_names])
 
     # Redact text fields
     for field in TEXT_FIELDS:
-        if field in record and record[field]:
-            record[field] = redact_text(record[field])
+        if field in table.column_names and not pa.types.is_null(table.schema.field(field).type):
+            index = table.schema.get_field_index(field)
+            table = table.set_column(index, field, redact_column(table[field]))
 
-    return record
+    return table
 
-def sanitize_file(input_path, output_path=None, verbose=True):
+def as_text(value):
+    """Serialize a non-string text field value (e.g. a JSON object) so it can be redacted"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+def column_values(values):
+    """
+    Prepare one field's values for Arrow type inference, which would
+    otherwise reshape or reject them: nested objects and lists become JSON
+    text, and if scalar types are mixed (other than int with float) every
+    value becomes text.
+    """
+    values = [json.dumps(value) if isinstance(value, (dict, list)) else value for value in values]
+    kinds = {type(value) for value in values if value is not None}
+    if len(kinds) > 1 and not kinds <= {int, float}:
+        values = [as_text(value) for value in values]
+    return values
+
+def records_to_table(records):
+    """Build an Arrow table from a list of record dicts (union of their keys)"""
+    fields = dict.fromkeys(field for record in records for field in record)
+    text_fields = set(TEXT_FIELDS)
+    return pa.table({
+        field: [as_text(record.get(field)) for record in records] if field in text_fields
+        else column_values([record.get(field) for record in records])
+        for field in fields
+    })
+
+def sanitize_chunk(chunk):
+    """Sanitize a list of records into an Arrow table (run in a worker process)"""
+    return sanitize_table(records_to_table(chunk))
+
+def iter_chunks(records, size=CHUNK_SIZE):
+    """Group a record stream into lists of at most `size` records"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def sanitize_parallel(records, workers=None):
+    """
+    Sanitize a record stream across worker processes, yielding one Arrow
+    table per chunk in input order.
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    while the input is still being streamed.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for chunk in iter_chunks(records):
+            yield sanitize_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in iter_chunks(records):
+            pending.append(executor.submit(sanitize_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def sanitize_file(input_path, output_path=None, verbose=True, workers=None):
     """
     Sanitize a JSON file.
 
     Args:
         input_path: Path to input JSON file
-        output_path: Path for output (default: data/error-jobs-sanitized.json.gz)
+        output_path: Path for output (default: data/error-jobs-sanitized.parquet)
         verbose: Print progress
+        workers: Number of worker processes (default: CPU count)
 
     Returns:
         output_path
@@ -116,50 +282,46 @@ def sanitize_file(input_path, output_path=None, verbose=True):
     input_path = Path(input_path)
 
     if output_path is None:
-        output_path = Path('data/error-jobs-sanitized.json.gz')
+        output_path = Path('data/error-jobs-sanitized.parquet')
     else:
         output_path = Path(output_path)
 
     if verbose:
-        print(f"Loading {input_path}...")
+        print(f"Sanitizing {input_path} -> {output_path}...")
 
-    data = load_json(input_path)
-
-    if verbose:
-        print(f"Sanitizing {len(data):,} records...")
+    def progress(tables):
+        processed = 0
+        for table in tables:
+            yield table
 
-    for i, record in enumerate(data):
-        sanitize_record(record)
-
-        if verbose and (i + 1) % 25000 == 0:
-            print(f"  {i + 1:,} / {len(data):,} processed")
-
-    if verbose:
-        print(f"Saving to {output_path}...")
+            processed += table.num_rows
+            if verbose:
+                print(f"  {processed:,} processed")
 
-    actual_path = save_json(data, output_path, compress=True)
+    tables = sanitize_parallel(iter_json(input_path), workers=workers)
+    actual_path, count = write_parquet(progress(tables), output_path)
 
     if verbose:
         size_mb = actual_path.stat().st_size / 1024 / 1024
-        print(f"Done. Output: {actual_path} ({size_mb:.1f} MB)")
+        print(f"Done. {count:,} records -> {actual_path} ({size_mb:.1f} MB)")
 
     return actual_path
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python sanitize.py <input_json> [output_json]")
+        print("Usage: python sanitize.py <input_json> [output_parquet]")
         print("")
         print("Sanitizes Galaxy error jobs JSON for public sharing.")
         print("")
         print("Actions performed:")
-        print("  - user_id: hashed with SHA256")
+        print("  - user_id: hashed with BLAKE2b (32-bit digest)")
         print("  - session_id, history_id: removed")
         print("  - Emails in text fields: replaced with [EMAIL]")
         print("  - /home/username paths: replaced with /home/[USER]")
         print("")
         print("Examples:")
         print("  python sanitize.py raw-errors.json")
-        print("  python sanitize.py raw-errors.json data/sanitized.json.gz")
+        print("  python sanitize.py raw-errors.json data/sanitized.parquet")
         sys.exit(1)
 
     input_path = sys.argv[1]
@@ -0,0 +1,44 @@
+import json
+import sys
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sanitize import hash_id, sanitize_chunk, sanitize_file, write_parquet  # noqa: E402
+
+def test_mixed_and_empty_nested_values(tmp_path):
+    records = [
+        {'user_id': 3, 'job_messages': [{'code': 1}], 'destination_params': {},
+         'params': {'a': 1}, 'dependencies': [{'name': 'samtools'}]},
+        {'user_id': '3', 'job_messages': 'x', 'destination_params': {},
+         'params': {'b': 'c'}, 'dependencies': []},
+    ]
+    input_path = tmp_path / 'jobs.json'
+    input_path.write_text(json.dumps(records))
+
+    output_path = sanitize_file(input_path, tmp_path / 'out.parquet', verbose=False, workers=1)
+    rows = pq.read_table(output_path).to_pylist()
+
+    assert [row['user_id'] for row in rows] == [hash_id(3), hash_id(3)]
+    assert [row['job_messages'] for row in rows] == ['[{"code": 1}]', 'x']
+    assert [row['destination_params'] for row in rows] == ['{}', '{}']
+    assert [row['params'] for row in rows] == ['{"a": 1}', '{"b": "c"}']
+    assert [row['dependencies'] for row in rows] == ['[{"name": "samtools"}]', '[]']
+
+def test_conflicting_types_across_chunks(tmp_path):
+    records = [
+        {'exit_code': 1, 'params': {'a': 1}, 'job_messages': [{'code': 1}]},
+        {'exit_code': 'killed', 'params': 'p', 'job_messages': 'x'},
+        {'exit_code': 2.5, 'params': None, 'job_messages': None},
+    ]
+    tables = [sanitize_chunk([record]) for record in records]
+
+    output_path, count = write_parquet(tables, tmp_path / 'out.parquet')
+    rows = pq.read_table(output_path).to_pylist()
+
+    assert count == 3
+    assert [row['exit_code'] for row in rows] == ['1', 'killed', '2.5']
+    assert [row['params'] for row in rows] == ['{"a": 1}', 'p', None]
+    assert [row['job_messages'] for row in rows] == ['[{"code": 1}]', 'x', None]
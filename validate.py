@@ -5,10 +5,33 @@ Checks required fields and data types.
 """
 
 import json
-import gzip
+import mmap
+import multiprocessing
+import os
+import stat
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 
+import ijson
+
+# python-isal inflates with ISA-L, several times faster than zlib; same API as gzip
+try:
+    from isal import igzip as gzip
+except ImportError:
+    import gzip
+
+# orjson parses bytes directly with SIMD; the stdlib parser is the fallback
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    def loads(data):
+        """Parse JSON from bytes or a buffer with the stdlib parser"""
+        return json.loads(bytes(data))
+
 REQUIRED_FIELDS = {
     'id': (int, type(None)),
     'create_time': str,
@@ -31,51 +54,263 @@ OPTIONAL_FIELDS = {
     'history_id': (int, type(None)),
 }
 
+# Every checked field as (name, expected_types, required), built once at import
+_FIELD_SPECS = (
+    tuple((name, types, True) for name, types in REQUIRED_FIELDS.items())
+    + tuple((name, types, False) for name, types in OPTIONAL_FIELDS.items())
+)
+_REQUIRED = frozenset(REQUIRED_FIELDS)
+
+# Display order for fields_found: known fields as declared, then any others sorted
+_ALL_KNOWN_FIELDS = tuple(REQUIRED_FIELDS) + tuple(OPTIONAL_FIELDS)
+_KNOWN = frozenset(_ALL_KNOWN_FIELDS)
+
+# Sentinel for absent fields (None is a valid value)
+_MISSING = object()
+
+# Errors kept before validate_file stops checking records
+MAX_ERRORS = 100
+
+# Full checks of files with more records than this are split across worker
+# processes in CHUNK_SIZE slices
+PARALLEL_THRESHOLD = 50000
+CHUNK_SIZE = 10000
+
+# Error codes. Errors are collected as (code, *args) tuples and only turned
+# into messages by format_error for the ones actually shown
+ERR_NOT_DICT = 0
+ERR_MISSING = 1
+ERR_TYPE = 2
+ERR_ISO = 3
+ERR_STOPPED = 4
+ERR_INVALID_JSON = 5
+ERR_NOT_ARRAY = 6
+ERR_LOAD = 7
+
+ERROR_FORMATS = {
+    ERR_NOT_DICT: "Record {0}: not a dictionary",
+    ERR_MISSING: "Record {0}: missing required field '{1}'",
+    ERR_TYPE: "Record {0}: field '{1}' has wrong type (got {2.__name__}{3})",
+    ERR_ISO: "Record {0}: create_time not in ISO8601 format: {1}",
+    ERR_STOPPED: f"... (stopped after {MAX_ERRORS} errors)",
+    ERR_INVALID_JSON: "Invalid JSON: {0}",
+    ERR_NOT_ARRAY: "JSON root must be an array of records",
+    ERR_LOAD: "Error loading file: {0}",
+}
+
+# Type errors name the expected types for required fields only
+_EXPECTED_REPRS = {
+    name: f", expected {types}" if required else ""
+    for name, types, required in _FIELD_SPECS
+}
+
+def format_error(error):
+    """Render an error tuple as a message"""
+    code, *args = error
+    if code == ERR_TYPE:
+        args.append(_EXPECTED_REPRS[args[1]])
+    return ERROR_FORMATS[code].format(*args)
+
+# Leading bytes of every gzip stream
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Bytes handed to the streaming parser per read (ijson defaults to 64 KiB)
+READ_SIZE = 1 << 20
+
+class NotAnArray(ValueError):
+    """The JSON document's root value is not an array"""
+
+def parse_error_message(error):
+    """First line of an ijson parse error (yajl appends a pointer to the error position)"""
+    message = error.args[0] if error.args else str(error)
+    # yajl2_c sometimes raises with the raw bytes of its message
+    if isinstance(message, bytes):
+        message = message.decode('utf-8', 'replace')
+    return str(message).splitlines()[0] if message else ''
+
+def open_input(raw):
+    """
+    Wrap a buffered binary file in a gzip reader if it starts with the gzip
+    magic bytes. Peeks rather than seeks, so pipes work too.
+    """
+    if raw.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=raw)
+    return raw
+
+def first_byte(f):
+    """Return the first non-whitespace byte of a buffered binary file, consuming only the whitespace before it"""
+    while True:
+        head = f.peek(1)
+        if not head:
+            return b''
+        content = head.lstrip()
+        f.read(len(head) - len(content))
+        if content:
+            return content[:1]
+
 def load_json(filepath):
-    """Load JSON from file (supports .json and .json.gz)"""
+    """Load JSON from file (plain or gzip-compressed, detected from its content)"""
     filepath = Path(filepath)
 
     if not filepath.exists():
         raise FileNotFoundError(f"File not found: {filepath}")
 
-    if filepath.suffix == '.gz':
-        with gzip.open(filepath, 'rt', encoding='utf-8') as f:
-            return json.load(f)
-    else:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    with open(filepath, 'rb') as raw:
+        f = open_input(raw)
+        if f is not raw:
+            with f:
+                return loads(f.read())
+
+        # Parse straight from the mapped pages instead of copying the file.
+        # Pipes cannot be mapped, and neither can empty files
+        if not f.seekable() or os.fstat(f.fileno()).st_size == 0:
+            return loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return loads(view)
+
+@lru_cache(maxsize=1)
+def _load_cached(filepath, stamp):
+    """load_json memoized on path and (mtime, size) stamp"""
+    return load_json(filepath)
+
+def load_json_cached(filepath):
+    """
+    Load JSON like load_json, reusing the parsed records when the same
+    unchanged file is loaded again (e.g. a pipeline re-validating a shard).
 
-def validate_record(record, index):
-    """Validate a single record, return list of errors"""
+    Only the most recent file is kept, as a parsed export can be several
+    times its size on disk.
+    """
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return load_json(filepath)  # reports the problem
+
+    # Pipes and devices have no stable stamp: their content differs per read
+    if not stat.S_ISREG(st.st_mode):
+        return load_json(filepath)
+    return _load_cached(os.path.abspath(filepath), (st.st_mtime_ns, st.st_size))
+
+def iter_records(filepath):
+    """Stream records from a JSON array file one at a time (plain or gzip-compressed)"""
+    filepath = Path(filepath)
+
+    if not filepath.exists():
+        raise FileNotFoundError(f"File not found: {filepath}")
+
+    with open(filepath, 'rb') as raw:
+        f = open_input(raw)
+        if first_byte(f) != b'[':
+            # Let the parser reject malformed input before blaming the root type
+            next(ijson.parse(f))
+            raise NotAnArray("JSON root must be an array of records")
+        # Handing ijson the file keeps the whole parse inside its C backend
+        yield from ijson.items(f, 'item', buf_size=READ_SIZE, use_float=True)
+
+def validate_record(record, index, budget=len(_FIELD_SPECS) + 1):
+    """Validate a single record, return list of at most `budget` error tuples"""
     errors = []
 
     if not isinstance(record, dict):
-        return [f"Record {index}: not a dictionary"]
-
-    # Check required fields
-    for field, expected_types in REQUIRED_FIELDS.items():
-        if field not in record:
-            errors.append(f"Record {index}: missing required field '{field}'")
-        elif not isinstance(record[field], expected_types):
-            errors.append(f"Record {index}: field '{field}' has wrong type "
-                         f"(got {type(record[field]).__name__}, expected {expected_types})")
-
-    # Check optional fields have correct types if present
-    for field, expected_types in OPTIONAL_FIELDS.items():
-        if field in record and record[field] is not None:
-            if not isinstance(record[field], expected_types):
-                errors.append(f"Record {index}: field '{field}' has wrong type "
-                             f"(got {type(record[field]).__name__})")
-
-    # Validate create_time format (ISO8601)
-    if 'create_time' in record and record['create_time']:
-        ct = record['create_time']
+        return [(ERR_NOT_DICT, index)]
+
+    # Check required fields are present and optional fields, if set, have the right type
+    for field, expected_types, required in _FIELD_SPECS:
+        value = record.get(field, _MISSING)
+        if value is _MISSING:
+            if required:
+                errors.append((ERR_MISSING, index, field))
+                if len(errors) >= budget:
+                    return errors
+        elif (required or value is not None) and not isinstance(value, expected_types):
+            errors.append((ERR_TYPE, index, field, type(value)))
+            if len(errors) >= budget:
+                return errors
+
+    # Validate create_time format (ISO8601). Single-character str compares
+    # are cheaper than encoding to bytes first: CPython caches 1-char strings
+    ct = record.get('create_time')
+    if ct and isinstance(ct, str):
         if not (len(ct) >= 19 and ct[4] == '-' and ct[7] == '-' and ct[10] == 'T'):
-            errors.append(f"Record {index}: create_time not in ISO8601 format: {ct[:30]}")
+            errors.append((ERR_ISO, index, ct[:30]))
 
     return errors
 
-def validate_file(filepath, sample_size=1000, verbose=True):
+def validate_records(records, start=0):
+    """
+    Validate a run of records numbered from `start`, stopping once more
+    than MAX_ERRORS errors have been found.
+
+    Returns:
+        (errors, fields_found, states_found, next_index)
+    """
+    errors = []
+    fields_found = set()
+    states_found = set()
+    index = start - 1
+
+    for index, record in enumerate(records, start):
+        errors.extend(validate_record(record, index, MAX_ERRORS + 1 - len(errors)))
+
+        if isinstance(record, dict):
+            # Key sets repeat from record to record: a read-only subset
+            # test is enough once the fields have been collected
+            keys = record.keys()
+            if not keys <= fields_found:
+                fields_found.update(keys)
+            if 'state' in record:
+                states_found.add(record['state'])
+
+        # Stop early if too many errors
+        if len(errors) > MAX_ERRORS:
+            break
+
+    return errors, fields_found, states_found, index + 1
+
+# Parsed records shared with forked workers (set only during validate_parallel)
+_records = None
+
+def _validate_chunk(bounds):
+    """Validate one slice of the shared record list (run in a worker process)"""
+    start, stop = bounds
+    return validate_records(_records[start:stop], start)
+
+def validate_parallel(data, workers):
+    """
+    Validate a list of records in CHUNK_SIZE slices across worker processes.
+
+    Workers are forked after the list is parsed and inherit it, so only the
+    slice bounds and each slice's results cross process boundaries.
+
+    Returns:
+        (errors, fields_found, states_found)
+    """
+    global _records
+
+    bounds = [(start, min(start + CHUNK_SIZE, len(data)))
+              for start in range(0, len(data), CHUNK_SIZE)]
+    errors = []
+    fields_found = set()
+    states_found = set()
+
+    _records = data
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    try:
+        # map yields in input order, so errors keep record order
+        for chunk_errors, chunk_fields, chunk_states, _ in executor.map(_validate_chunk, bounds):
+            errors.extend(chunk_errors)
+            fields_found |= chunk_fields
+            states_found |= chunk_states
+            if len(errors) > MAX_ERRORS:
+                del errors[MAX_ERRORS + 1:]
+                break
+    finally:
+        executor.shutdown(cancel_futures=True)
+        _records = None
+
+    return errors, fields_found, states_found
+
+def validate_file(filepath, sample_size=1000, verbose=True, workers=None):
     """
     Validate JSON file structure.
 
@@ -83,63 +318,79 @@ def validate_file(filepath, sample_size=1000, verbose=True):
         filepath: Path to JSON file
         sample_size: Number of records to fully validate (0 = all)
         verbose: Print progress
+        workers: Worker processes for full checks of large files (default: CPU count)
 
     Returns:
-        (is_valid, stats, errors)
+        (is_valid, stats, errors) where errors are tuples for format_error
     """
     if verbose:
         print(f"Loading {filepath}...")
 
+    # A full check parses the whole file eagerly; a sampled check streams it
+    # so only one record is held in memory at a time
+    if sample_size == 0:
+        try:
+            data = load_json_cached(filepath)
+        except ValueError as e:
+            return False, {}, [(ERR_INVALID_JSON, e)]
+        except Exception as e:
+            return False, {}, [(ERR_LOAD, e)]
+
+        if not isinstance(data, list):
+            return False, {}, [(ERR_NOT_ARRAY,)]
+
+        if verbose:
+            print(f"Found {len(data):,} records")
+        records = iter(data)
+    else:
+        data = None
+        records = iter_records(filepath)
+
+    workers = workers or os.cpu_count() or 1
+    parallel = (sample_size == 0 and workers > 1 and len(data) > PARALLEL_THRESHOLD
+                and 'fork' in multiprocessing.get_all_start_methods())
+
     try:
-        data = load_json(filepath)
-    except json.JSONDecodeError as e:
-        return False, {}, [f"Invalid JSON: {e}"]
+        # Validate records
+        if parallel:
+            errors, fields_found, states_found = validate_parallel(data, workers)
+        else:
+            sample = islice(records, sample_size) if sample_size else records
+            errors, fields_found, states_found, total = validate_records(sample)
+
+        if len(errors) > MAX_ERRORS:
+            errors.append((ERR_STOPPED,))
+
+        if sample_size == 0:
+            total = len(data)
+        else:
+            # Check remaining records for basic structure (just dict check).
+            # Parsed JSON objects are always exact dicts, so a type identity
+            # test suffices
+            index = total - 1
+            for index, record in enumerate(records, total):
+                if type(record) is not dict and len(errors) <= MAX_ERRORS:
+                    errors.append((ERR_NOT_DICT, index))
+            total = index + 1
+    except NotAnArray:
+        return False, {}, [(ERR_NOT_ARRAY,)]
+    except ijson.JSONError as e:
+        return False, {}, [(ERR_INVALID_JSON, parse_error_message(e))]
     except Exception as e:
-        return False, {}, [f"Error loading file: {e}"]
+        return False, {}, [(ERR_LOAD, e)]
 
-    if not isinstance(data, list):
-        return False, {}, ["JSON root must be an array of records"]
-
-    total = len(data)
-    if verbose:
+    if verbose and sample_size > 0:
         print(f"Found {total:,} records")
 
-    errors = []
-    fields_found = set()
-    states_found = set()
-
-    # Validate records
     check_count = total if sample_size == 0 else min(sample_size, total)
 
-    for i in range(check_count):
-        record = data[i]
-        record_errors = validate_record(record, i)
-        errors.extend(record_errors)
-
-        if isinstance(record, dict):
-            fields_found.update(record.keys())
-            if 'state' in record:
-                states_found.add(record['state'])
-
-        # Stop early if too many errors
-        if len(errors) > 100:
-            errors.append(f"... (stopped after 100 errors)")
-            break
-
-    # Check remaining records for basic structure (just dict check)
-    if sample_size > 0 and total > sample_size:
-        for i in range(sample_size, total):
-            if not isinstance(data[i], dict):
-                errors.append(f"Record {i}: not a dictionary")
-                if len(errors) > 100:
-                    break
-
     stats = {
         'total_records': total,
         'records_validated': check_count,
-        'fields_found': sorted(fields_found),
+        'fields_found': ([f for f in _ALL_KNOWN_FIELDS if f in fields_found]
+                         + sorted(fields_found - _KNOWN)),
         'states_found': sorted(states_found),
-        'required_fields_present': all(f in fields_found for f in REQUIRED_FIELDS),
+        'required_fields_present': _REQUIRED <= fields_found,
     }
 
     is_valid = len(errors) == 0 and stats['required_fields_present']
@@ -179,8 +430,7 @@ def main():
 
     if errors:
         print("ERRORS:")
-        for err in errors[:20]:
-            print(f"  - {err}")
+        print('\n'.join(f"  - {format_error(err)}" for err in errors[:20]))
         if len(errors) > 20:
             print(f"  ... and {len(errors) - 20} more errors")
         print("")